@@ -1,12 +1,27 @@
+import atexit
+import contextlib
+import functools
+import os
+import threading
+import time
 from collections.abc import Callable
+from concurrent.futures import ThreadPoolExecutor
 from dataclasses import dataclass
 from pathlib import Path
+from typing import Literal
 
-import matplotlib.pyplot as plt
-import matplotlib.dates as mdates
-from matplotlib.ticker import FuncFormatter
+import numpy as np
 import pandas as pd
-import yfinance as yf
+
+try:
+    import pyarrow as pa
+except ImportError:  # optional; enables the download cache and parquet output
+    pa = None
+
+try:
+    from tsdownsample import NaNMinMaxLTTBDownsampler
+except ImportError:  # optional; without it every point is plotted
+    NaNMinMaxLTTBDownsampler = None
 
 
 # centralized theme to keep plots consistent and decoupled from matplotlib defaults
@@ -25,26 +40,140 @@ PLOT_THEME = {
     "axes.titleweight": "bold",
 }
 
+# csv compression method -> (file suffix, pandas option for the fastest level)
+CSV_COMPRESSION = {
+    "gzip": (".gz", {"compresslevel": 1}),
+    "bz2": (".bz2", {"compresslevel": 1}),
+    "xz": (".xz", {"preset": 1}),
+    "zstd": (".zst", {"level": 1}),
+}
+
+# seconds a cached download stays fresh: one bar for intraday intervals (the
+# latest bar keeps changing), six hours for daily and longer bars
+CACHE_TTL_BY_INTERVAL = {
+    "1m": 60,
+    "2m": 2 * 60,
+    "5m": 5 * 60,
+    "15m": 15 * 60,
+    "30m": 30 * 60,
+    "60m": 60 * 60,
+    "90m": 90 * 60,
+    "1h": 60 * 60,
+    "1d": 6 * 60 * 60,
+    "5d": 6 * 60 * 60,
+    "1wk": 6 * 60 * 60,
+    "1mo": 6 * 60 * 60,
+    "3mo": 6 * 60 * 60,
+}
+
+# downloads are network-bound; more threads than this just trip yahoo rate limits
+MAX_DOWNLOAD_WORKERS = 8
+
+# ~1500 px wide chart; more points than this only alias into the same pixels
+PLOT_MAX_POINTS = 2000
+
+# pyplot labels of the figures the plot functions reuse between calls
+PRICE_SMA_FIGURE = "price_sma"
+SMA_OVERLAY_FIGURE = "sma_overlay"
+
+# line colors for multi-ticker overlays, cycled when there are more tickers
+OVERLAY_COLORS = ["#7AD9C7", "#D16F60", "#E6C36A", "#8FA8F0", "#C792EA", "#6FCF97"]
+
 
 @dataclass
 class Config:
-    ticker: str = "AMZN"
+    ticker: str | list[str] = "AMZN"
     period: str = "5y"
     interval: str = "1d"
     sma_window: int = 20
     out_dir: Path = Path("stock_data")
     show_plots: bool = True
+    output_format: Literal["csv", "parquet"] = "csv"
+    compression: Literal["gzip", "bz2", "xz", "zstd"] | None = None  # csv only
+    low_precision: bool = False  # float32 derived columns; summary stays float64
+    # seconds; None follows CACHE_TTL_BY_INTERVAL, 0 disables the download cache
+    cache_ttl: float | None = None
+
+    @property
+    def tickers(self) -> list[str]:
+        return [self.ticker] if isinstance(self.ticker, str) else list(self.ticker)
+
+    @property
+    def cache_dir(self) -> Path:
+        return self.out_dir / ".cache"
+
+    @property
+    def download_cache_ttl(self) -> float:
+        if self.cache_ttl is not None:
+            return self.cache_ttl
+        return CACHE_TTL_BY_INTERVAL.get(self.interval, 0)  # unknown: no caching
 
     def ensure_out_dir(self) -> None:
-        self.out_dir.mkdir(parents=True, exist_ok=True)
+        self.cache_dir.mkdir(parents=True, exist_ok=True)  # creates out_dir too
+
+
+def _read_cache(path: Path, ttl: float) -> pd.DataFrame | None:
+    assert pa is not None  # fetch_prices only caches when pyarrow is installed
+    if not path.exists() or time.time() - path.stat().st_mtime > ttl:
+        return None
+    try:
+        return pd.read_parquet(path, engine="pyarrow")
+    except pa.ArrowException:  # unreadable file -> refetch
+        return None
+
+
+def _write_cache(df: pd.DataFrame, path: Path) -> None:
+    assert pa is not None  # fetch_prices only caches when pyarrow is installed
+    tmp_path = path.with_name(f"{path.name}.tmp")
+    try:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        df.to_parquet(tmp_path, engine="pyarrow")
+        tmp_path.replace(path)  # atomic rename, readers never see a partial file
+    except (OSError, pa.ArrowException) as e:
+        # best effort: a failed cache write must not cost us the download
+        print(f"[WARN] Could not cache {path}: {e}")
+        with contextlib.suppress(OSError):
+            tmp_path.unlink(missing_ok=True)
+
+
+_tz_cache_lock = threading.Lock()
+_tz_cache_dir: str | None = None
+
+
+def _set_tz_cache_location(cache_dir: Path) -> None:
+    # yfinance closes its open tz db on every call, so only switch when the dir
+    # changes; the lock keeps concurrent fetches from closing it mid-download
+    import yfinance as yf
+
+    global _tz_cache_dir
+    with _tz_cache_lock:
+        if _tz_cache_dir != str(cache_dir):
+            yf.set_tz_cache_location(str(cache_dir))
+            _tz_cache_dir = str(cache_dir)
 
 
 def fetch_prices(
     ticker: str,
     period: str,
     interval: str,
-    downloader: Callable[..., pd.DataFrame | None] = yf.download,
+    downloader: Callable[..., pd.DataFrame | None] | None = None,
+    cache_dir: Path | None = None,
+    cache_ttl: float = 0,
 ) -> pd.DataFrame:
+    cache_path = None
+    if cache_dir is not None and cache_ttl > 0 and pa is not None:
+        cache_path = cache_dir / f"{ticker}_{period}_{interval}.parquet"
+        cached = _read_cache(cache_path, cache_ttl)
+        if cached is not None:
+            return cached
+
+    if downloader is None:
+        import yfinance as yf  # deferred: heavy import, not needed on a cache hit
+
+        if cache_dir is not None:
+            _set_tz_cache_location(cache_dir)
+        downloader = yf.download
+
     df = downloader(
         ticker,
         period=period,
@@ -62,8 +191,14 @@ def fetch_prices(
     if df.empty:
         raise RuntimeError(f"All data was NaN for ticker {ticker}")
 
-    df = df.sort_index()  # ensure deterministic start/end stats and plotting
+    # ensure deterministic start/end stats and plotting; yfinance already returns
+    # sorted data, so only pay for the sort when the O(N) check fails
+    if not df.index.is_monotonic_increasing:
+        df = df.sort_index()
     df.index.name = "Date"
+
+    if cache_path is not None:
+        _write_cache(df, cache_path)
     return df
 
 
@@ -71,50 +206,250 @@ def get_close(df: pd.DataFrame) -> pd.Series:
     """Prefer adjusted close; fall back to close when needed."""
     if "Adj Close" in df.columns:
         if "Close" in df.columns:
-            return df["Adj Close"].fillna(df["Close"])
-        return df["Adj Close"]
-    if "Close" in df.columns:
-        return df["Close"]
-    raise KeyError("Expected 'Adj Close' or 'Close' column in data")
+            close = df["Adj Close"].fillna(df["Close"])
+        else:
+            close = df["Adj Close"]
+    elif "Close" in df.columns:
+        close = df["Close"]
+    else:
+        raise KeyError("Expected 'Adj Close' or 'Close' column in data")
+
+    # yfinance returns (Price, Ticker) columns, so a single ticker selects a frame
+    if isinstance(close, pd.DataFrame):
+        close = close.squeeze(axis=1)
+    return close
+
+
+def _close_array(df: pd.DataFrame) -> np.ndarray:
+    # forward-fill gaps so returns span them; shared by metrics, plot and summary
+    return get_close(df).ffill().to_numpy(dtype=np.float64)
+
+
+def _rolling_mean_loop(arr: np.ndarray, w: int) -> np.ndarray:
+    # single pass: add the value entering the window, drop the one leaving it
+    out = np.empty(arr.shape[0], dtype=np.float64)
+    total = 0.0
+    nobs = np.int64(0)
+    for i in range(arr.shape[0]):
+        val = arr[i]
+        if not np.isnan(val):
+            total += val
+            nobs += 1
+        if i >= w:
+            prev = arr[i - w]
+            if not np.isnan(prev):
+                total -= prev
+                nobs -= 1
+        out[i] = total / w if nobs >= w else np.nan
+    return out
+
+
+def _rolling_mean_cumsum(arr: np.ndarray, w: int) -> np.ndarray:
+    # numpy fallback: window sums as differences of one cumulative sum
+    out = np.full(arr.shape[0], np.nan)
+    if w > arr.shape[0]:
+        return out
+    valid = ~np.isnan(arr)
+    sums = np.concatenate(([0.0], np.cumsum(np.where(valid, arr, 0.0))))
+    nobs = np.concatenate(([0], np.cumsum(valid)))
+    window_sums = sums[w:] - sums[:-w]
+    out[w - 1 :] = np.where(nobs[w:] - nobs[:-w] >= w, window_sums / w, np.nan)
+    return out
+
+
+@functools.cache
+def _rolling_mean_impl() -> Callable[[np.ndarray, int], np.ndarray]:
+    try:
+        import numba
+    except ImportError:  # optional speedup; fall back to the numpy cumsum window
+        return _rolling_mean_cumsum
+
+    # nan-aware kernel; fastmath without "nnan" so the isnan checks survive
+    kernel = numba.njit(
+        cache=True,
+        fastmath={"nsz", "arcp", "contract", "afn", "reassoc"},
+        nogil=True,
+    )(_rolling_mean_loop)
+
+    if os.environ.get("STOCK_ANALYSIS_PRECOMPILE") == "1":
+        # what _close_array hands over: contiguous float64, read-only under pandas
+        # copy-on-write; an exact match means the first call does not re-dispatch
+        kernel.compile(
+            numba.float64[::1](
+                numba.types.Array(numba.float64, 1, "C", readonly=True), numba.int64
+            )
+        )
+    return kernel
+
+
+def _rolling_mean(arr: np.ndarray, w: int) -> np.ndarray:
+    """Trailing mean over `w` values; NaN until the window has `w` observations."""
+    # numba is a slow import, so it is only loaded once an sma is computed
+    return _rolling_mean_impl()(arr, w)
+
+
+if os.environ.get("STOCK_ANALYSIS_PRECOMPILE") == "1":
+    # compile now (or load the cached build from __pycache__) instead of
+    # paying the jit cost inside the first add_metrics call
+    _rolling_mean_impl()
 
 
-def add_metrics(df: pd.DataFrame, sma_window: int) -> pd.DataFrame:
-    out = df.copy()
-    close = get_close(out).ffill()  # make pct_change behavior explicit
-    out["return_daily"] = close.pct_change()
-    out[f"SMA_{sma_window}"] = close.rolling(sma_window).mean()
+def add_metrics(
+    df: pd.DataFrame,
+    sma_window: int,
+    close_arr: np.ndarray | None = None,
+    low_precision: bool = False,
+) -> pd.DataFrame:
+    """Add return_daily and SMA_<window> columns to `df` in place and return it."""
+    if sma_window < 1:
+        raise ValueError(f"sma_window must be a positive integer, got {sma_window}")
+
+    out = df
+    c = _close_array(out) if close_arr is None else close_arr
+    # only the derived columns shrink; the raw price columns keep float64
+    dtype = np.float32 if low_precision else np.float64
+
+    # ratio - 1 cancels digits, so take it in float64 before narrowing
+    r = np.empty(c.shape, dtype=np.float64)
+    r[:1] = np.nan
+    with np.errstate(divide="ignore", invalid="ignore"):  # match pct_change: inf/nan
+        np.divide(c[1:], c[:-1], out=r[1:])
+    r[1:] -= 1.0
+    out["return_daily"] = r.astype(dtype, copy=False)
+    # the running sum stays float64 so it does not drift over long series
+    out[f"SMA_{sma_window}"] = _rolling_mean(c, sma_window).astype(dtype, copy=False)
 
     return out
 
 
 def save_csv(df: pd.DataFrame, ticker: str, cfg: Config) -> Path:
+    if cfg.compression is not None and cfg.output_format != "csv":
+        raise ValueError(
+            f"compression={cfg.compression!r} only applies to csv output, "
+            f"not {cfg.output_format}"
+        )
+    if cfg.output_format == "parquet":
+        if pa is None:
+            raise RuntimeError("Parquet output requires pyarrow")
+        path = cfg.out_dir / f"{ticker}.parquet"
+        df.to_parquet(path, engine="pyarrow", compression="snappy")
+        return path
+    if cfg.output_format != "csv":
+        raise ValueError(f"Unsupported output format: {cfg.output_format}")
+
     path = cfg.out_dir / f"{ticker}.csv"
 
-    df.to_csv(path)
+    if cfg.compression is not None:
+        if cfg.compression not in CSV_COMPRESSION:
+            raise ValueError(f"Unsupported csv compression: {cfg.compression}")
+        suffix, options = CSV_COMPRESSION[cfg.compression]
+        path = path.with_name(path.name + suffix)
+        # pandas streams through the compressor, fewer bytes ever hit the disk
+        df.to_csv(path, compression={"method": cfg.compression, **options})
+    else:
+        df.to_csv(path)
 
     return path
 
 
-def plot_price_sma(df: pd.DataFrame, ticker: str, sma_window: int, cfg: Config) -> Path:
-    close = get_close(df)
+def _downsample(
+    x: np.ndarray, y: np.ndarray, n_out: int = PLOT_MAX_POINTS
+) -> np.ndarray:
+    """Indices of the points worth plotting (MinMaxLTTB); all of them if few."""
+    if len(y) <= n_out or NaNMinMaxLTTBDownsampler is None:
+        return np.arange(len(y))
+    return NaNMinMaxLTTBDownsampler().downsample(x, y, n_out=n_out)
+
+
+def _index_ns(index: pd.Index) -> np.ndarray:
+    # monotonic int64 x values for the downsampler; tz-aware stamps go to utc
+    return index.to_numpy(dtype="datetime64[ns]").view("i8")
+
+
+def _date_nums(index: pd.DatetimeIndex) -> np.ndarray:
+    import matplotlib.dates as mdates
+
+    # one vectorised datetime64 -> float pass instead of matplotlib converting
+    # the index again for every line; tz-aware data keeps its wall-clock time
+    return mdates.date2num(index.tz_localize(None).to_numpy())
+
+
+def _init_pyplot(show_plots: bool):
+    # deferred: matplotlib is the slowest import and only plotting needs it
+    import matplotlib
+
+    if not show_plots:
+        matplotlib.use("Agg", force=True)  # headless, skips gui toolkit setup
+
+    import matplotlib.pyplot as plt
+
+    if not show_plots:
+        plt.ioff()
+    return plt
+
+
+def _close_reusable_figs() -> None:
+    import matplotlib.pyplot as plt
+
+    for label in (PRICE_SMA_FIGURE, SMA_OVERLAY_FIGURE):
+        plt.close(label)
+
+
+@functools.cache
+def _register_fig_cleanup() -> None:
+    # once per process; a per-figure handler would pin every recreated figure
+    atexit.register(_close_reusable_figs)
+
+
+def _get_reusable_fig(label: str = PRICE_SMA_FIGURE):
+    import matplotlib.pyplot as plt
+
+    # pyplot returns the already open figure for a known label, so batch runs
+    # keep one canvas (and its rgba buffer) instead of building one per ticker;
+    # a fresh one is only created on first use or after its window was closed
+    fig = plt.figure(label, figsize=(10, 5))
+    if not fig.axes:
+        fig.add_subplot()
+        _register_fig_cleanup()
+    ax = fig.axes[0]
+    ax.clear()
+    return fig, ax
+
+
+def plot_price_sma(
+    df: pd.DataFrame,
+    ticker: str,
+    sma_window: int,
+    cfg: Config,
+    close_arr: np.ndarray | None = None,
+) -> Path:
+    plt = _init_pyplot(cfg.show_plots)
+    import matplotlib.dates as mdates
+    from matplotlib.ticker import FuncFormatter
+
+    close = _close_array(df) if close_arr is None else close_arr
     sma_col = f"SMA_{sma_window}"
-    sma = df[sma_col]
+
+    # same indices for both lines so the sma stays aligned with the price
+    idx = _downsample(_index_ns(df.index), close)
+    x = _date_nums(df.index[idx])
+    close = close[idx]
+    sma = df[sma_col].to_numpy(dtype=np.float64)[idx]
 
     out_path = cfg.out_dir / f"{ticker}_price_sma.png"
 
     with plt.rc_context(PLOT_THEME):
-        fig, ax = plt.subplots(figsize=(10, 5))
+        fig, ax = _get_reusable_fig()
+        ax.plot(x, close, label="Price", linewidth=1.8, color="#7AD9C7")
         ax.plot(
-            close.index, close.values, label="Price", linewidth=1.8, color="#7AD9C7"
-        )
-        ax.plot(
-            df.index,
+            x,
             sma,
             label=f"SMA {sma_window}",
             linewidth=1.6,
             alpha=0.9,
             color="#D16F60",
         )
+        ax.xaxis_date()  # x is plain floats, tell the axis they are dates
         ax.set(
             title=f"{ticker} - Price & SMA",
             xlabel="Date",
@@ -128,68 +463,171 @@ def plot_price_sma(df: pd.DataFrame, ticker: str, sma_window: int, cfg: Config)
         ax.grid(True, which="major")
         fig.tight_layout()
 
-        fig.savefig(out_path, dpi=150)
+        # layout is already tight; bbox_inches="tight" would render a second time
+        fig.savefig(out_path, dpi=150, bbox_inches=None)
 
         if cfg.show_plots:
             plt.show()
 
-        plt.close(fig)
-
     return out_path
 
 
-def summarize(df: pd.DataFrame) -> pd.DataFrame:
-    close: pd.Series = get_close(df)
+def plot_sma_overlay(
+    frames: dict[str, pd.DataFrame], sma_window: int, cfg: Config
+) -> Path:
+    """Draw every ticker's SMA over their common date range on one chart."""
+    plt = _init_pyplot(cfg.show_plots)
+    import matplotlib.dates as mdates
+    from matplotlib.collections import LineCollection
+    from matplotlib.lines import Line2D
+    from matplotlib.ticker import FuncFormatter
 
-    returns = df["return_daily"].dropna()
+    sma_col = f"SMA_{sma_window}"
+    start = max(_date_nums(df.index[:1])[0] for df in frames.values())
+    end = min(_date_nums(df.index[-1:])[0] for df in frames.values())
+
+    segments = []
+    for df in frames.values():
+        sma = df[sma_col].to_numpy(dtype=np.float64)
+        idx = _downsample(_index_ns(df.index), sma)
+        x = _date_nums(df.index[idx])
+        y = sma[idx]
+        # trim to the range all tickers cover
+        lo, hi = np.searchsorted(x, start), np.searchsorted(x, end, side="right")
+        x, y = x[lo:hi], y[lo:hi]
+        keep = ~np.isnan(y)
+        segments.append(np.column_stack([x[keep], y[keep]]))
+
+    colors = [OVERLAY_COLORS[i % len(OVERLAY_COLORS)] for i in range(len(frames))]
+    out_path = cfg.out_dir / f"sma_{sma_window}_overlay.png"
 
-    stats = {
+    with plt.rc_context(PLOT_THEME):
+        fig, ax = _get_reusable_fig(SMA_OVERLAY_FIGURE)
+        # one collection is a single draw call regardless of the ticker count
+        ax.add_collection(LineCollection(segments, colors=colors, linewidths=1.6))
+        ax.autoscale_view()  # collections only extend the data limits
+        ax.xaxis_date()
+        ax.set(
+            title=f"SMA {sma_window} - {', '.join(frames)}",
+            xlabel="Date",
+            ylabel="Price (USD)",
+        )
+        ax.yaxis.set_major_formatter(FuncFormatter(lambda x, _: f"${x:,.2f}"))
+        locator = mdates.AutoDateLocator(minticks=5, maxticks=10)
+        ax.xaxis.set_major_locator(locator)
+        ax.xaxis.set_major_formatter(mdates.ConciseDateFormatter(locator))
+        handles = [Line2D([], [], color=c, linewidth=1.6) for c in colors]
+        ax.legend(handles, list(frames), frameon=False, ncol=min(len(frames), 4))
+        ax.grid(True, which="major")
+        fig.tight_layout()
+
+        fig.savefig(out_path, dpi=150, bbox_inches=None)
+
+        if cfg.show_plots:
+            plt.show()
+
+    return out_path
+
+
+def summarize(
+    df: pd.DataFrame, close_arr: np.ndarray | None = None
+) -> dict[str, float | int | str]:
+    close = _close_array(df) if close_arr is None else close_arr
+    start, end = float(close[0]), float(close[-1])
+    # divide as np.float64 so a zero start price gives inf like pandas did
+    with np.errstate(divide="ignore", invalid="ignore"):
+        total = float(np.float64(end) / start - 1)
+    # fmin/fmax reduce in one pass each and skip NaN, unlike np.min/np.max
+    cmin, cmax = float(np.fmin.reduce(close)), float(np.fmax.reduce(close))
+
+    returns = df["return_daily"].to_numpy(dtype=np.float64, copy=False)
+    returns = returns[~np.isnan(returns)]
+    # ddof=1 keeps the sample std pandas reported
+    rmean = float(returns.mean()) if returns.size else float("nan")
+    rstd = float(returns.std(ddof=1)) if returns.size > 1 else float("nan")
+
+    # floats are rounded as they go in; ints and dates are left as they are
+    return {
         "Rows": len(df),
         "Start Date": df.index[0].strftime("%Y-%m-%d"),
         "End Date": df.index[-1].strftime("%Y-%m-%d"),
-        "Start Price": float(close.iloc[0]),
-        "End Price": float(close.iloc[-1]),
-        "Total Return (%)": float((close.iloc[-1] / close.iloc[0] - 1) * 100),
-        "Daily Return Mean (%)": float(returns.mean() * 100),
-        "Daily Return Std (%)": float(returns.std() * 100),
-        "Min Price": float(close.min()),
-        "Max Price": float(close.max()),
+        "Start Price": round(start, 2),
+        "End Price": round(end, 2),
+        "Total Return (%)": round(total * 100, 2),
+        "Daily Return Mean (%)": round(rmean * 100, 2),
+        "Daily Return Std (%)": round(rstd * 100, 2),
+        "Min Price": round(cmin, 2),
+        "Max Price": round(cmax, 2),
     }
 
-    df_out = pd.DataFrame([stats]).T.rename(columns={0: "Value"})
-
-    nums = pd.to_numeric(df_out["Value"], errors="coerce")
 
-    df_out["Value"] = df_out["Value"].where(nums.isna(), nums.round(2))
+def format_summary(stats: dict[str, float | int | str]) -> str:
+    """Render summary stats as an aligned two-column table."""
+    lines = []
+    for key, value in stats.items():
+        # fixed decimals only for display; summarize already rounded the values
+        cell = f"{value:.2f}" if isinstance(value, float) else str(value)
+        lines.append(f"{key:<25}{cell:>12}")
+    return "\n".join(lines)
 
-    return df_out
 
-
-def run_analysis(cfg: Config) -> None:
-    print(
-        f"[INFO] Analyzing {cfg.ticker} | "
-        f"Period: {cfg.period} | "
-        f"Interval: {cfg.interval}"
+def _analyze_ticker(df: pd.DataFrame, ticker: str, cfg: Config) -> pd.DataFrame:
+    close_arr = _close_array(df)  # computed once, reused by every step below
+    df = add_metrics(
+        df, cfg.sma_window, close_arr=close_arr, low_precision=cfg.low_precision
     )
+    csv_path = save_csv(df, ticker, cfg)
+    print(f"[OK] Saved: {csv_path}")
 
-    try:
-        df = fetch_prices(cfg.ticker, cfg.period, cfg.interval)
+    png_path = plot_price_sma(df, ticker, cfg.sma_window, cfg, close_arr=close_arr)
+    print(f"[OK] Saved: {png_path}")
 
-        cfg.ensure_out_dir()
+    stats = summarize(df, close_arr=close_arr)
 
-        df = add_metrics(df, cfg.sma_window)
-        csv_path = save_csv(df, cfg.ticker, cfg)
-        print(f"[OK] Saved: {csv_path}")
+    print(format_summary(stats))
 
-        png_path = plot_price_sma(df, cfg.ticker, cfg.sma_window, cfg)
-        print(f"[OK] Saved: {png_path}")
+    return df
 
-        stats = summarize(df)
 
-        print(stats)
+def run_analysis(cfg: Config) -> None:
+    tickers = cfg.tickers
+    print(
+        f"[INFO] Analyzing {', '.join(tickers)} | "
+        f"Period: {cfg.period} | "
+        f"Interval: {cfg.interval}"
+    )
 
-    except (RuntimeError, KeyError, ValueError) as e:
-        print(f"[ERROR] {e}")
+    cfg.ensure_out_dir()
+
+    # fetch every ticker concurrently; analysis and plotting stay on this thread
+    # because matplotlib figures are not thread-safe
+    workers = max(1, min(MAX_DOWNLOAD_WORKERS, len(tickers)))
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        futures = {
+            ticker: pool.submit(
+                fetch_prices,
+                ticker,
+                cfg.period,
+                cfg.interval,
+                cache_dir=cfg.cache_dir,
+                cache_ttl=cfg.download_cache_ttl,
+            )
+            for ticker in tickers
+        }
+
+    frames = {}
+    for ticker, future in futures.items():
+        try:
+            frames[ticker] = _analyze_ticker(future.result(), ticker, cfg)
+        except (RuntimeError, KeyError, ValueError) as e:
+            print(f"[ERROR] {ticker}: {e}")
+
+    if len(frames) > 1:
+        try:
+            overlay_path = plot_sma_overlay(frames, cfg.sma_window, cfg)
+            print(f"[OK] Saved: {overlay_path}")
+        except (RuntimeError, KeyError, ValueError) as e:
+            print(f"[ERROR] SMA overlay: {e}")
 
 
 def main() -> None:
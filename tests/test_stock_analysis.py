@@ -1,20 +1,124 @@
+import numpy as np
 import pandas as pd
 import pytest
 
-from stock_analysis import add_metrics, fetch_prices, get_close
+from stock_analysis import (
+    PLOT_MAX_POINTS,
+    PRICE_SMA_FIGURE,
+    SMA_OVERLAY_FIGURE,
+    Config,
+    _downsample,
+    _rolling_mean_cumsum,
+    _rolling_mean_loop,
+    add_metrics,
+    fetch_prices,
+    format_summary,
+    get_close,
+    plot_price_sma,
+    plot_sma_overlay,
+    run_analysis,
+    save_csv,
+    summarize,
+)
 
 
 def test_add_metrics():
     data = {"Close": [10, 20, 30, 40, 50], "Adj Close": [10, 20, 30, 40, 50]}
     df = pd.DataFrame(data)
 
-    df = add_metrics(df, 2)
+    out = add_metrics(df, 2)
 
+    assert out is df  # columns are added in place, no copy of the frame
     assert "return_daily" in df.columns
     assert "SMA_2" in df.columns
     assert df["SMA_2"].iloc[-1] == 45
 
 
+def test_add_metrics_sma_matches_pandas_rolling():
+    close = [np.nan, 10.0, 12.0, 11.0, 15.0, 14.0, 18.0]
+    df = pd.DataFrame({"Close": close})
+
+    df = add_metrics(df, 3)
+
+    expected = pd.Series(close).rolling(3).mean()
+    np.testing.assert_allclose(df["SMA_3"], expected)
+
+
+@pytest.mark.parametrize("kernel", [_rolling_mean_loop, _rolling_mean_cumsum])
+def test_rolling_mean_kernels_match_pandas(kernel):
+    arr = np.array([np.nan, 10.0, 12.0, np.nan, 15.0, 14.0, 18.0, 17.0])
+
+    for window in (1, 2, 3, len(arr) + 1):
+        expected = pd.Series(arr).rolling(window).mean().to_numpy()
+        np.testing.assert_allclose(kernel(arr, window), expected)
+
+
+def test_add_metrics_returns_match_pct_change():
+    close = [np.nan, 10.0, np.nan, 11.0, 15.0]
+    df = pd.DataFrame({"Close": close})
+
+    df = add_metrics(df, 2)
+
+    expected = pd.Series(close).ffill().pct_change()
+    np.testing.assert_allclose(df["return_daily"], expected)
+
+
+def test_add_metrics_low_precision_only_shrinks_derived_columns():
+    df = pd.DataFrame({"Close": [10.0, 20.0, 30.0, 40.0, 50.0]})
+
+    df = add_metrics(df, 2, low_precision=True)
+
+    assert df["Close"].dtype == np.float64
+    assert df["return_daily"].dtype == np.float32
+    assert df["SMA_2"].dtype == np.float32
+    assert df["SMA_2"].iloc[-1] == 45
+
+
+def test_add_metrics_low_precision_returns_match_pct_change():
+    rng = np.random.default_rng(0)
+    close = pd.Series(100 * np.cumprod(1 + rng.normal(0, 1e-4, 1000)))
+
+    df = add_metrics(pd.DataFrame({"Close": close.to_numpy()}), 2, low_precision=True)
+
+    expected = close.pct_change().astype(np.float32)
+    np.testing.assert_allclose(df["return_daily"], expected, rtol=1e-6)
+
+
+def test_summarize_matches_pandas_reductions():
+    close = pd.Series([10.0, 12.0, 9.0, 15.0, 14.0])
+    index = pd.date_range("2024-01-01", periods=len(close), name="Date")
+    df = add_metrics(pd.DataFrame({"Close": close.to_numpy()}, index=index), 2)
+
+    stats = summarize(df)
+
+    returns = close.pct_change().dropna()
+    assert stats["Rows"] == 5
+    assert stats["Start Date"] == "2024-01-01"
+    assert stats["Min Price"] == 9.0
+    assert stats["Max Price"] == 15.0
+    assert stats["Total Return (%)"] == 40.0
+    assert stats["Daily Return Std (%)"] == round(returns.std() * 100, 2)
+
+
+def test_summarize_zero_start_price_gives_inf():
+    index = pd.date_range("2024-01-01", periods=2, name="Date")
+    df = add_metrics(pd.DataFrame({"Close": [0.0, 5.0]}, index=index), 1)
+
+    assert summarize(df)["Total Return (%)"] == float("inf")
+
+
+def test_format_summary_pads_floats_only():
+    stats = {"Rows": 3, "Start Date": "2024-01-01", "Total Return (%)": 12.3456}
+
+    lines = format_summary(stats).splitlines()
+
+    assert lines == [
+        f"{'Rows':<25}{'3':>12}",
+        f"{'Start Date':<25}{'2024-01-01':>12}",
+        f"{'Total Return (%)':<25}{'12.35':>12}",
+    ]
+
+
 def test_get_close_raises_when_missing_columns():
     df = pd.DataFrame({"Open": [1, 2, 3]})
 
@@ -28,3 +132,210 @@ def test_fetch_prices_raises_when_download_returns_none():
 
     with pytest.raises(RuntimeError, match="No data returned"):
         fetch_prices("AMZN", "5y", "1d", downloader=fake_download)
+
+
+def test_fetch_prices_sorts_out_of_order_rows():
+    def fake_download(*_args, **_kwargs):
+        index = pd.to_datetime(["2024-01-03", "2024-01-01", "2024-01-02"])
+        return pd.DataFrame({"Close": [3.0, 1.0, 2.0]}, index=index)
+
+    df = fetch_prices("AMZN", "5y", "1d", downloader=fake_download)
+
+    assert df.index.is_monotonic_increasing
+    assert df["Close"].tolist() == [1.0, 2.0, 3.0]
+
+
+def test_fetch_prices_reuses_disk_cache(tmp_path):
+    pytest.importorskip("pyarrow")
+    calls = []
+
+    def fake_download(*_args, **_kwargs):
+        calls.append(1)
+        index = pd.date_range("2024-01-01", periods=3, name="Date")
+        return pd.DataFrame({"Close": [1.0, 2.0, 3.0]}, index=index)
+
+    first = fetch_prices(
+        "AMZN", "5y", "1d", downloader=fake_download, cache_dir=tmp_path, cache_ttl=60
+    )
+    second = fetch_prices(
+        "AMZN", "5y", "1d", downloader=fake_download, cache_dir=tmp_path, cache_ttl=60
+    )
+
+    assert len(calls) == 1
+    assert (tmp_path / "AMZN_5y_1d.parquet").exists()
+    pd.testing.assert_frame_equal(first, second, check_freq=False)
+
+
+def test_fetch_prices_survives_failed_cache_write(tmp_path):
+    pytest.importorskip("pyarrow")
+    cache_dir = tmp_path / "not_a_dir"
+    cache_dir.write_text("")  # mkdir inside the cache write fails
+
+    def fake_download(*_args, **_kwargs):
+        return pd.DataFrame({"Close": [1.0, 2.0]})
+
+    df = fetch_prices(
+        "AMZN", "5y", "1d", downloader=fake_download, cache_dir=cache_dir, cache_ttl=60
+    )
+
+    assert df["Close"].tolist() == [1.0, 2.0]
+    assert list(tmp_path.iterdir()) == [cache_dir]
+
+
+def test_config_cache_ttl_follows_interval():
+    assert Config(interval="1m").download_cache_ttl == 60
+    assert Config(interval="1d").download_cache_ttl == 6 * 60 * 60
+    assert Config(interval="1m", cache_ttl=0).download_cache_ttl == 0
+
+
+@pytest.mark.parametrize("output_format", ["csv", "parquet"])
+def test_save_csv_round_trips(tmp_path, output_format):
+    if output_format == "parquet":
+        pytest.importorskip("pyarrow")
+    index = pd.date_range("2024-01-01", periods=3, name="Date")
+    df = add_metrics(pd.DataFrame({"Close": [1.5, 2.5, 3.5]}, index=index), 2)
+    cfg = Config(out_dir=tmp_path, output_format=output_format)
+
+    path = save_csv(df, "AMZN", cfg)
+
+    if output_format == "csv":
+        loaded = pd.read_csv(path, index_col="Date", parse_dates=True)
+    else:
+        loaded = pd.read_parquet(path)
+    assert path.suffix == f".{output_format}"
+    pd.testing.assert_frame_equal(loaded, df, check_freq=False, check_index_type=False)
+
+
+def test_save_csv_keeps_ticker_header_row(tmp_path):
+    columns = pd.MultiIndex.from_product(
+        [["Close", "Volume"], ["AMZN"]], names=["Price", "Ticker"]
+    )
+    index = pd.date_range("2024-01-01", periods=2, name="Date")
+    df = pd.DataFrame([[1.5, 10.0], [2.5, 20.0]], index=index, columns=columns)
+
+    path = save_csv(df, "AMZN", Config(out_dir=tmp_path))
+
+    loaded = pd.read_csv(path, header=[0, 1], index_col=0, parse_dates=True)
+    pd.testing.assert_frame_equal(loaded, df, check_freq=False)
+
+
+@pytest.mark.parametrize(("compression", "suffix"), [("gzip", ".gz"), ("zstd", ".zst")])
+def test_save_csv_compresses_when_configured(tmp_path, compression, suffix):
+    if compression == "zstd":
+        pytest.importorskip("zstandard")
+    df = add_metrics(pd.DataFrame({"Close": [1.5, 2.5, 3.5]}), 2)
+    cfg = Config(out_dir=tmp_path, compression=compression)
+
+    path = save_csv(df, "AMZN", cfg)
+
+    assert path.name == f"AMZN.csv{suffix}"
+    pd.testing.assert_frame_equal(pd.read_csv(path, index_col=0), df)
+
+
+def test_save_csv_rejects_compression_for_parquet(tmp_path):
+    df = pd.DataFrame({"Close": [1.5, 2.5, 3.5]})
+    cfg = Config(out_dir=tmp_path, output_format="parquet", compression="gzip")
+
+    with pytest.raises(ValueError, match="only applies to csv"):
+        save_csv(df, "AMZN", cfg)
+
+
+def test_plot_sma_overlay_trims_to_common_range(tmp_path):
+    import matplotlib.dates as mdates
+    import matplotlib.pyplot as plt
+    from matplotlib.collections import LineCollection
+
+    ranges = {
+        "AMZN": pd.date_range("2024-01-01", "2024-01-20", name="Date"),
+        "MSFT": pd.date_range("2024-01-05", "2024-01-31", name="Date"),
+    }
+    frames = {
+        ticker: add_metrics(pd.DataFrame({"Close": np.arange(len(idx)) + 1.0}, idx), 1)
+        for ticker, idx in ranges.items()
+    }
+
+    plot_sma_overlay(frames, 1, Config(out_dir=tmp_path, show_plots=False))
+
+    lines = plt.figure(SMA_OVERLAY_FIGURE).axes[0].collections[0]
+    assert isinstance(lines, LineCollection)
+    for segment in lines.get_segments():
+        assert segment[0, 0] == mdates.date2num(pd.Timestamp("2024-01-05"))
+        assert segment[-1, 0] == mdates.date2num(pd.Timestamp("2024-01-20"))
+
+
+def test_plot_price_sma_reuses_and_clears_figure(tmp_path):
+    import matplotlib.pyplot as plt
+
+    index = pd.date_range("2024-01-01", periods=5, name="Date")
+    cfg = Config(out_dir=tmp_path, show_plots=False)
+
+    figs = []
+    for ticker in ["AMZN", "MSFT"]:
+        df = add_metrics(pd.DataFrame({"Close": np.arange(5) + 1.0}, index), 2)
+        plot_price_sma(df, ticker, 2, cfg)
+        figs.append(plt.figure(PRICE_SMA_FIGURE))
+
+    assert figs[0] is figs[1]
+    ax = figs[1].axes[0]
+    assert len(ax.lines) == 2
+    assert ax.get_title() == "MSFT - Price & SMA"
+
+
+def test_downsample_keeps_short_series():
+    y = np.arange(PLOT_MAX_POINTS, dtype=np.float64)
+
+    np.testing.assert_array_equal(_downsample(y, y), np.arange(PLOT_MAX_POINTS))
+
+
+def test_plot_price_sma_downsamples_both_lines_alike(tmp_path):
+    import matplotlib.pyplot as plt
+
+    pytest.importorskip("tsdownsample")
+    n = 3 * PLOT_MAX_POINTS
+    index = pd.date_range("2024-01-01", periods=n, freq="h", name="Date")
+    close = 100 + np.cumsum(np.random.default_rng(0).normal(size=n))
+    df = add_metrics(pd.DataFrame({"Close": close}, index), 20)
+
+    plot_price_sma(df, "AMZN", 20, Config(out_dir=tmp_path, show_plots=False))
+
+    price, sma = plt.figure(PRICE_SMA_FIGURE).axes[0].lines
+    assert np.asarray(price.get_xdata()).size <= PLOT_MAX_POINTS
+    np.testing.assert_array_equal(price.get_xdata(), sma.get_xdata())
+
+
+def _fake_fetch(ticker, *_args, **_kwargs):
+    if ticker == "FAIL":
+        raise RuntimeError("No data returned")
+    index = pd.date_range("2024-01-01", periods=5, name="Date")
+    return pd.DataFrame({"Close": [10.0, 12.0, 9.0, 15.0, 14.0]}, index=index)
+
+
+def test_run_analysis_skips_failed_ticker(tmp_path, monkeypatch, capsys):
+    monkeypatch.setattr("stock_analysis.fetch_prices", _fake_fetch)
+    cfg = Config(
+        ticker=["AMZN", "FAIL"], sma_window=2, out_dir=tmp_path, show_plots=False
+    )
+
+    run_analysis(cfg)
+
+    assert "[ERROR] FAIL: No data returned" in capsys.readouterr().out
+    assert (tmp_path / "AMZN.csv").exists()
+    assert (tmp_path / "AMZN_price_sma.png").exists()
+    assert not (tmp_path / "FAIL.csv").exists()
+    assert not list(tmp_path.glob("sma_*_overlay.png"))
+
+
+def test_run_analysis_reports_overlay_failure(tmp_path, monkeypatch, capsys):
+    def broken_overlay(*_args):
+        raise ValueError("bad overlay")
+
+    monkeypatch.setattr("stock_analysis.fetch_prices", _fake_fetch)
+    monkeypatch.setattr("stock_analysis.plot_sma_overlay", broken_overlay)
+    cfg = Config(
+        ticker=["AMZN", "MSFT"], sma_window=2, out_dir=tmp_path, show_plots=False
+    )
+
+    run_analysis(cfg)
+
+    assert "[ERROR] SMA overlay: bad overlay" in capsys.readouterr().out
+    assert (tmp_path / "MSFT.csv").exists()